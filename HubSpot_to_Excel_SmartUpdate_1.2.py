@@ -1,13 +1,66 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
 from datetime import datetime
+import gzip
+import hashlib
+import io
 import json
+import logging
 import os
-from openpyxl import load_workbook
+from operator import itemgetter
+import pickle
+import time
+from concurrent.futures import ThreadPoolExecutor
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import PatternFill, Font
 import sys
 
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
 class HubSpotExporter:
+    # HubSpot property -> Contacts sheet column
+    CONTACT_COLUMNS = {
+        "email": "Email",
+        "firstname": "First Name",
+        "lastname": "Last Name",
+        "phone": "Phone",
+        "company": "Company",
+        "lifecyclestage": "Lifecycle Stage",
+        "hs_lead_status": "Lead Status"
+    }
+    CONTACT_PROPERTIES = list(CONTACT_COLUMNS)
+    
+    # The Search API allows 4 requests/second and at most 10,000 results
+    SEARCH_MIN_INTERVAL = 0.25
+    SEARCH_MAX_RESULTS = 10000
+    
+    # Cached list pulls are refreshed with deltas, and re-pulled in full
+    # once a day to pick up contacts that left a list
+    CACHE_MAX_AGE = 24 * 60 * 60
+    
+    # Lists and a successful connection test are reused for 5 minutes
+    SESSION_CACHE_TTL = 5 * 60
+    
+    # Log fetch progress every N pages rather than on every request
+    PROGRESS_PAGES = 50
+    
+    EMAIL_COLUMNS = ["Contact ID", "Contact Email", "Contact Name", "Email Subject", "Email Direction", "Email Status", "Email Date", "Email Preview"]
+    MEETING_COLUMNS = ["Contact ID", "Contact Email", "Contact Name", "Meeting Title", "Meeting Start", "Meeting End", "Meeting Outcome", "Meeting Notes"]
+    SUMMARY_COLUMNS = ["Total Emails", "Total Meetings", "Last Email Date", "Last Meeting Date"]
+    
     def __init__(self, api_key):
         self.api_key = api_key
         self.base_url = "https://api.hubapi.com"
@@ -16,9 +69,43 @@ class HubSpotExporter:
             "Content-Type": "application/json"
         }
         self.debug = True
+        self.cache_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".hubspot_cache")
+        self._last_search = 0.0
+        self._lists_cache = None
+        self._connection_ok_at = None
+        
+        # One pooled keep-alive session for every call, so each page
+        # doesn't pay for a fresh TCP + TLS handshake
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        retries = Retry(total=5, backoff_factor=0.5,
+                        status_forcelist=[429, 500, 502, 503, 504],
+                        allowed_methods=None, raise_on_status=False)
+        self.session.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=32,
+                                                   max_retries=retries))
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def close(self):
+        """Close the underlying HTTP session"""
+        self.session.close()
     
-    def test_connection(self):
+    def _json(self, response):
+        """Decode a JSON response, with orjson when it is installed"""
+        if orjson is not None:
+            return orjson.loads(response.content)
+        return response.json()
+    
+    def test_connection(self, force_refresh=False):
         """Test the API connection and validate the API key"""
+        if (not force_refresh and self._connection_ok_at is not None
+                and time.monotonic() - self._connection_ok_at < self.SESSION_CACHE_TTL):
+            return True
+        
         print("\n🔍 Testing HubSpot API connection...")
         print(f"   API Key: {self.api_key[:20]}..." if len(self.api_key) > 20 else f"   API Key: {self.api_key}")
         
@@ -26,13 +113,14 @@ class HubSpotExporter:
         url = f"{self.base_url}/crm/v3/objects/contacts?limit=1"
         
         try:
-            response = requests.get(url, headers=self.headers)
+            response = self.session.get(url)
             
             if response.status_code == 200:
                 print("✅ API connection successful!")
-                data = response.json()
+                data = self._json(response)
                 total_contacts = data.get("total", 0)
                 print(f"   Total contacts in HubSpot: {total_contacts}")
+                self._connection_ok_at = time.monotonic()
                 return True
             elif response.status_code == 401:
                 print("\n❌ Authentication failed! (401 Error)")
@@ -57,8 +145,14 @@ class HubSpotExporter:
             print(f"❌ Connection error: {str(e)}")
             return False
     
-    def get_lists(self):
+    def get_lists(self, force_refresh=False):
         """Fetch all available lists"""
+        if self._lists_cache and not force_refresh:
+            fetched_at, lists = self._lists_cache
+            if time.monotonic() - fetched_at < self.SESSION_CACHE_TTL:
+                self._print_lists(lists)
+                return lists
+        
         print("\n📋 Fetching available lists...")
         
         # Try both v1 and v3 endpoints
@@ -69,27 +163,17 @@ class HubSpotExporter:
         
         for url in endpoints:
             try:
-                response = requests.get(url, headers=self.headers)
+                response = self.session.get(url)
                 
                 if response.status_code == 200:
                     if "/v1/" in url:
-                        lists = response.json().get("lists", [])
+                        lists = self._json(response).get("lists", [])
                     else:
-                        lists = response.json().get("results", [])
+                        lists = self._json(response).get("results", [])
                     
                     if lists:
-                        print(f"\n✅ Found {len(lists)} lists:")
-                        print("-" * 70)
-                        for lst in lists:
-                            if "/v1/" in url:
-                                print(f"Name: {lst.get('name', 'Unknown')}")
-                                print(f"ID: {lst.get('listId', 'Unknown')}")
-                                print(f"Contact Count: {lst.get('metaData', {}).get('size', 0)}")
-                            else:
-                                print(f"Name: {lst.get('name', 'Unknown')}")
-                                print(f"ID: {lst.get('hs_list_id', lst.get('listId', 'Unknown'))}")
-                                print(f"Contact Count: {lst.get('hs_list_size', 0)}")
-                            print("-" * 70)
+                        self._lists_cache = (time.monotonic(), lists)
+                        self._print_lists(lists)
                         return lists
                 elif response.status_code == 401:
                     print(f"❌ Authentication failed for {url}")
@@ -101,27 +185,58 @@ class HubSpotExporter:
         print("❌ Could not fetch lists from any endpoint")
         return []
     
+    def _print_lists(self, lists):
+        """Print name, ID and size of v1 or v3 lists"""
+        print(f"\n✅ Found {len(lists)} lists:")
+        print("-" * 70)
+        for lst in lists:
+            print(f"Name: {lst.get('name', 'Unknown')}")
+            print(f"ID: {lst.get('hs_list_id', lst.get('listId', 'Unknown'))}")
+            print(f"Contact Count: {lst.get('metaData', {}).get('size', lst.get('hs_list_size', 0))}")
+            print("-" * 70)
+    
     def get_contacts_from_list(self, list_id, limit=100):
         """Fetch contacts from a specific list"""
+        print(f"\n📥 Fetching contacts from list {list_id}...")
+        
+        contacts = self._get_cached_list_members(list_id)
+        if contacts is not None:
+            print(f"\n✅ Total contacts retrieved: {len(contacts)}")
+            return contacts
+        
+        # No results can also mean ilslists doesn't know this id (e.g. a
+        # legacy listId from get_lists) - let the first v1 page confirm it
+        contacts = self._search_list_members(list_id)
+        if contacts:
+            self._save_cache(list_id, contacts)
+            print(f"\n✅ Total contacts retrieved: {len(contacts)}")
+            return contacts
+        if contacts is not None and self.debug:
+            logger.info("   Search found no contacts, checking list pagination")
+        
+        # Fall back to legacy v1 list pagination
         contacts = []
         offset = 0
         page = 1
         
-        print(f"\n📥 Fetching contacts from list {list_id}...")
+        # Loop invariants bound to locals once, outside the page loop
+        url = f"{self.base_url}/contacts/v1/lists/{list_id}/contacts/all"
+        params = {
+            "count": limit,
+            "vidOffset": offset,
+            "property": self.CONTACT_PROPERTIES
+        }
+        get = self.session.get
+        parse = self._json
+        contacts_extend = contacts.extend
+        show_progress = self.debug
+        progress_pages = self.PROGRESS_PAGES
         
         while True:
-            url = f"{self.base_url}/contacts/v1/lists/{list_id}/contacts/all"
-            params = {
-                "count": limit,
-                "vidOffset": offset,
-                "property": ["email", "firstname", "lastname", "phone", "company", "lifecyclestage", "hs_lead_status"]
-            }
-            
-            if self.debug:
-                print(f"   Fetching page {page} (offset: {offset})...")
+            params["vidOffset"] = offset
             
             try:
-                response = requests.get(url, headers=self.headers, params=params)
+                response = get(url, params=params)
                 
                 if response.status_code == 401:
                     print(f"❌ Authentication failed! Please check your API token.")
@@ -134,12 +249,11 @@ class HubSpotExporter:
                     print(f"❌ Error {response.status_code}: {response.text}")
                     return []
                 
-                data = response.json()
-                page_contacts = data.get("contacts", [])
-                contacts.extend(page_contacts)
+                data = parse(response)
+                contacts_extend(data.get("contacts", []))
                 
-                if self.debug:
-                    print(f"   Retrieved {len(page_contacts)} contacts")
+                if show_progress and page % progress_pages == 0:
+                    logger.info("   Fetched %d pages (%d contacts)...", page, len(contacts))
                 
                 if data.get("has-more", False):
                     offset = data.get("vid-offset", 0)
@@ -153,51 +267,262 @@ class HubSpotExporter:
         
         print(f"\n✅ Total contacts retrieved: {len(contacts)}")
         
-        # Convert to v3 format
-        v3_contacts = []
-        for contact in contacts:
-            v3_contact = {
+        # Convert to v3 format - v1 wraps every property as {"value": ...}
+        try:
+            v3_contacts = [{
                 "id": str(contact.get("vid", "")),
-                "properties": {}
-            }
-            
-            # Flatten properties
-            props = contact.get("properties", {})
-            for prop, value in props.items():
-                if isinstance(value, dict):
-                    v3_contact["properties"][prop] = value.get("value", "")
-                else:
-                    v3_contact["properties"][prop] = value
-            
-            v3_contacts.append(v3_contact)
+                "properties": {prop: value.get("value", "") for prop, value in contact.get("properties", {}).items()}
+            } for contact in contacts]
+        except AttributeError:
+            # Unexpected shape with bare values - unwrap field by field
+            v3_contacts = [{
+                "id": str(contact.get("vid", "")),
+                "properties": {prop: value.get("value", "") if isinstance(value, dict) else value
+                               for prop, value in contact.get("properties", {}).items()}
+            } for contact in contacts]
         
         return v3_contacts
     
-    def load_existing_data(self, filepath):
-        """Load existing Excel file and return dataframes for each sheet"""
-        existing_data = {}
+    def _search_payload(self, list_id, modified_since=None):
+        """Build a Search API request body for members of a list"""
+        filters = []
+        if list_id != "all":
+            filters.append({"propertyName": "ilslists", "operator": "IN", "values": [list_id]})
+        if modified_since is not None:
+            filters.append({"propertyName": "hs_lastmodifieddate", "operator": "GTE", "value": str(modified_since)})
+        
+        payload = {
+            "properties": self.CONTACT_PROPERTIES + ["hs_lastmodifieddate"],
+            "limit": 200
+        }
+        if filters:
+            payload["filterGroups"] = [{"filters": filters}]
+        return payload
+    
+    def _search_post(self, payload):
+        """POST a search request, keeping under the Search API rate limit"""
+        wait = self.SEARCH_MIN_INTERVAL - (time.monotonic() - self._last_search)
+        if wait > 0:
+            time.sleep(wait)
+        self._last_search = time.monotonic()
+        return self.session.post(f"{self.base_url}/crm/v3/objects/contacts/search", json=payload)
+    
+    def _search_list_members(self, list_id, modified_since=None):
+        """Fetch list members through the v3 Search API
+
+        Returns contacts already in v3 shape, or None when search can't
+        serve this list (error response or more results than search allows).
+        With modified_since (epoch milliseconds) only contacts changed since
+        then are returned.
+        """
+        payload = self._search_payload(list_id, modified_since)
+        contacts = []
+        page = 1
         
-        if os.path.exists(filepath):
-            print(f"📂 Loading existing file: {filepath}")
+        while True:
             try:
-                excel_file = pd.ExcelFile(filepath)
-                for sheet_name in excel_file.sheet_names:
-                    df = pd.read_excel(filepath, sheet_name=sheet_name)
-                    existing_data[sheet_name] = df
-                    print(f"   ✓ Loaded sheet '{sheet_name}' with {len(df)} rows")
+                response = self._search_post(payload)
+                if response.status_code != 200:
+                    if self.debug:
+                        logger.info("   Search unavailable (%s), using list pagination", response.status_code)
+                    return None
+                
+                data = self._json(response)
             except Exception as e:
-                print(f"⚠️  Error loading existing file: {e}")
-                return {}
+                print(f"   Search error: {str(e)}")
+                return None
+            
+            if data.get("total", 0) > self.SEARCH_MAX_RESULTS:
+                if self.debug:
+                    logger.info("   %d contacts exceeds search limit, using list pagination", data['total'])
+                return None
+            
+            page_contacts = data.get("results", [])
+            contacts.extend(page_contacts)
+            
+            if self.debug and page % self.PROGRESS_PAGES == 0:
+                logger.info("   Searched %d pages (%d contacts)...", page, len(contacts))
+            
+            after = data.get("paging", {}).get("next", {}).get("after")
+            if after:
+                payload["after"] = after
+                page += 1
+            else:
+                break
         
-        return existing_data
+        return contacts
+    
+    def _search_total(self, list_id):
+        """Return the current number of contacts in a list, or None"""
+        payload = self._search_payload(list_id)
+        payload["limit"] = 1
+        try:
+            response = self._search_post(payload)
+            if response.status_code == 200:
+                return self._json(response).get("total")
+        except Exception:
+            pass
+        return None
+    
+    def _get_cached_list_members(self, list_id):
+        """Refresh a cached list pull with only the contacts changed since
+
+        Returns None when there is no usable cache, so the caller does a
+        full pull instead.
+        """
+        state = self._load_cache_state().get(self._cache_key(list_id))
+        if not state or state.get("watermark") is None:
+            return None
+        if time.time() - state.get("refreshed", 0) > self.CACHE_MAX_AGE:
+            return None
+        
+        try:
+            with gzip.open(self._cache_path(list_id), "rb") as f:
+                cached = pickle.load(f)
+        except Exception:
+            return None
+        
+        print(f"   Using cache, fetching changes since last pull...")
+        delta = self._search_list_members(list_id, modified_since=state["watermark"])
+        if delta is None:
+            return None
+        
+        contacts = {contact["id"]: contact for contact in cached}
+        contacts.update((contact["id"], contact) for contact in delta)
+        
+        # Deltas can't show contacts leaving the list - re-pull if sizes differ.
+        # A swap that keeps the size equal goes unnoticed until CACHE_MAX_AGE
+        if self._search_total(list_id) != len(contacts):
+            print("   List membership changed, doing a full pull")
+            return None
+        
+        print(f"   {len(delta)} contacts changed since last pull")
+        contacts = list(contacts.values())
+        self._save_cache(list_id, contacts, refreshed=state["refreshed"])
+        return contacts
+    
+    def _cache_key(self, list_id):
+        """Cache key for a list, scoped to the token and fetched properties"""
+        parts = [self.api_key, ",".join(self.CONTACT_PROPERTIES), str(list_id)]
+        return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()
+    
+    def _cache_path(self, list_id):
+        """Cache file holding the last pull of a list"""
+        return os.path.join(self.cache_dir, f"{self._cache_key(list_id)}.pkl.gz")
+    
+    def _load_cache_state(self):
+        """Load per-list watermarks from state.json"""
+        try:
+            with open(os.path.join(self.cache_dir, "state.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _save_cache(self, list_id, contacts, refreshed=None):
+        """Persist a list pull and its hs_lastmodifieddate high-watermark"""
+        stamps = self._parse_timestamps(
+            pd.Series([contact.get("properties", {}).get("hs_lastmodifieddate") for contact in contacts], dtype=object)
+        )
+        latest = stamps.max()
+        watermark = None if pd.isna(latest) else int(latest.timestamp() * 1000)
+        
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with gzip.open(self._cache_path(list_id), "wb") as f:
+                pickle.dump(contacts, f, protocol=pickle.HIGHEST_PROTOCOL)
+            
+            state = self._load_cache_state()
+            state[self._cache_key(list_id)] = {"watermark": watermark, "refreshed": refreshed or time.time()}
+            with open(os.path.join(self.cache_dir, "state.json"), "w", encoding="utf-8") as f:
+                json.dump(state, f, indent=2)
+        except OSError as e:
+            print(f"⚠️  Could not write cache: {e}")
     
-    def merge_contact_data(self, new_contacts, existing_contacts):
-        """Merge new contact data with existing, preserving custom columns"""
+    def load_existing_data(self, filepath):
+        """Load the Contacts sheet of an existing Excel file
+
+        Only Contacts is read - every other sheet is regenerated from
+        scratch on each export. Of its columns only Contact ID and custom
+        columns are kept; HubSpot columns are rebuilt from the fetch.
+        """
+        if not os.path.exists(filepath):
+            return {}
+        
+        print(f"📂 Loading existing file: {filepath}")
+        return self._collect_existing(lambda: self._read_existing_contacts(filepath))
+    
+    def _collect_existing(self, load):
+        """Call load() and report its outcome as load_existing_data does
+
+        Kept apart from the read itself so update_excel can read on a worker
+        thread and still print the result in order on the main thread.
+        """
+        try:
+            df = load()
+        except Exception as e:
+            print(f"⚠️  Error loading existing file: {e}")
+            return {}
+        
+        if df is None:
+            print("   ⚠️  No 'Contacts' sheet in existing file")
+            return {}
+        
+        print(f"   ✓ Loaded sheet 'Contacts' with {len(df)} rows")
+        return {'Contacts': df}
+    
+    def _read_existing_contacts(self, filepath):
+        """Read Contact ID and custom columns, or None without a Contacts sheet"""
+        # One sequential read of the zip container; the parser
+        # then seeks around in memory instead of on disk
+        with open(filepath, 'rb') as f:
+            buffer = io.BytesIO(f.read())
+        wb = load_workbook(buffer, read_only=True, data_only=True)
+        try:
+            if 'Contacts' not in wb.sheetnames:
+                return None
+            rows = wb['Contacts'].values
+            # Name blank header cells as pd.read_excel does, so several of
+            # them don't end up as duplicate None labels in the merge
+            header = [f"Unnamed: {i}" if col is None else col
+                      for i, col in enumerate(next(rows, None) or ())]
+            # Without a (correct) <dimension> the read-only reader doesn't
+            # pad rows, so a row can be shorter than the header
+            width = len(header)
+            rows = (row if len(row) >= width else row + (None,) * (width - len(row))
+                    for row in rows)
+            hubspot_columns = {"Last Updated", *self.CONTACT_COLUMNS.values()}
+            keep = [i for i, col in enumerate(header) if col not in hubspot_columns]
+            columns = [header[i] for i in keep]
+            if len(keep) > 1:
+                pick = itemgetter(*keep)
+                df = pd.DataFrame((pick(row) for row in rows), columns=columns)
+            elif keep:
+                df = pd.DataFrame({columns[0]: [row[keep[0]] for row in rows]})
+            else:
+                df = pd.DataFrame()
+            return df.dropna(how='all')
+        finally:
+            wb.close()
+    
+    def _contacts_frame(self, contacts):
+        """Build the Contacts sheet from v3-shaped contacts"""
+        # One list per column - far cheaper than json_normalize on large lists
+        props = [contact.get("properties", {}) for contact in contacts]
+        data = {"Contact ID": [contact.get("id", "") for contact in contacts]}
+        data.update({name: [p.get(prop) for p in props] for prop, name in self.CONTACT_COLUMNS.items()})
+        
+        contact_df = pd.DataFrame(data)
+        contact_df["Last Updated"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        
+        # Every HubSpot field is text - store it as a string column with
+        # blanks filled once, rather than object columns mixing str and NaN
+        return contact_df.fillna("").astype("string")
+    
+    def merge_contact_df(self, new_df, existing_contacts):
+        """Merge a new contact DataFrame with existing, preserving custom columns"""
         if existing_contacts is None or existing_contacts.empty:
-            return pd.DataFrame(new_contacts)
+            return new_df
         
-        # Convert to DataFrames
-        new_df = pd.DataFrame(new_contacts)
         existing_df = existing_contacts.copy()
         
         # Check if existing data has Contact ID column
@@ -217,23 +542,26 @@ class HubSpotExporter:
             print("   ⚠️  No new data to merge")
             return existing_df
         
-        # Create mapping of Contact ID to existing custom data
-        custom_data = existing_df[['Contact ID'] + custom_columns].set_index('Contact ID').to_dict('index')
-        
-        # Add Last Updated column
-        new_df['Last Updated'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        # Compare IDs as strings - Excel hands them back as numbers, and a
+        # single blank ID turns the column float64 (1000 -> "1000.0")
+        ids = existing_df['Contact ID']
+        if pd.api.types.is_numeric_dtype(ids):
+            ids = pd.to_numeric(ids, errors='coerce').astype('Int64')
+        has_id = ids.notna()
+        existing_df = existing_df.loc[has_id].assign(**{'Contact ID': ids[has_id].astype(str)})
+        new_df = new_df.assign(**{'Contact ID': new_df['Contact ID'].astype(str)})
         
-        # Add custom columns to new data
-        for col in custom_columns:
-            new_df[col] = new_df['Contact ID'].map(lambda x: custom_data.get(x, {}).get(col, ''))
+        # Add custom columns to new data with a single hash join
+        if custom_columns:
+            custom_df = existing_df[['Contact ID'] + custom_columns].drop_duplicates('Contact ID')
+            new_df = new_df.merge(custom_df, on='Contact ID', how='left')
+            new_df[custom_columns] = new_df[custom_columns].fillna('')
         
         # Identify changes
-        existing_ids = set(existing_df['Contact ID'])
-        new_ids = set(new_df['Contact ID'])
-        added_ids = new_ids - existing_ids
+        added_count = (~new_df['Contact ID'].isin(existing_df['Contact ID'])).sum()
         
-        if added_ids:
-            print(f"   ✨ Found {len(added_ids)} new contacts")
+        if added_count:
+            print(f"   ✨ Found {added_count} new contacts")
         
         return new_df
     
@@ -251,85 +579,75 @@ class HubSpotExporter:
         script_dir = os.path.dirname(os.path.abspath(__file__))
         full_filepath = os.path.join(script_dir, filename)
         
-        # Load existing data
-        existing_data = self.load_existing_data(full_filepath)
+        # Load existing data in the background while contacts download -
+        # parsing the workbook is local work, fetching is network-bound.
+        # Only the read runs on the thread; its outcome is printed below,
+        # after the fetch output, so the console stays in order
+        file_found = os.path.exists(full_filepath)
+        if file_found:
+            print(f"📂 Loading existing file: {full_filepath}")
+        
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            if file_found:
+                existing_future = pool.submit(self._read_existing_contacts, full_filepath)
+            
+            # Get contacts
+            if list_id:
+                contacts = self.get_contacts_from_list(list_id)
+                export_type = f"List {list_name or list_id}"
+            else:
+                print("\n📥 Fetching all contacts...")
+                contacts = self.get_contacts_from_list("all")  # Use "all" for all contacts
+                export_type = "All Contacts"
+            
+            existing_data = self._collect_existing(existing_future.result) if file_found else {}
         file_exists = bool(existing_data)
         
-        # Get contacts
-        if list_id:
-            contacts = self.get_contacts_from_list(list_id)
-            export_type = f"List {list_name or list_id}"
-        else:
-            print("\n📥 Fetching all contacts...")
-            contacts = self.get_contacts_from_list("all")  # Use "all" for all contacts
-            export_type = "All Contacts"
+        # The existing file only holds Contact ID and custom columns in
+        # memory, so never rebuild it without fresh HubSpot data
+        if not contacts and file_exists:
+            print("\n⚠️  No contacts retrieved - leaving existing file unchanged.")
+            return False
         
         # Prepare data
-        contact_data = []
-        email_data = []
-        meeting_data = []
-        
-        # Process contacts
-        for i, contact in enumerate(contacts):
-            if (i + 1) % 10 == 0:
-                print(f"   Processing contact {i+1}/{len(contacts)}...")
-            
-            contact_id = contact.get("id", "")
-            properties = contact.get("properties", {})
-            
-            contact_info = {
-                "Contact ID": contact_id,
-                "Email": properties.get("email", ""),
-                "First Name": properties.get("firstname", ""),
-                "Last Name": properties.get("lastname", ""),
-                "Phone": properties.get("phone", ""),
-                "Company": properties.get("company", ""),
-                "Lifecycle Stage": properties.get("lifecyclestage", ""),
-                "Lead Status": properties.get("hs_lead_status", ""),
-                "Last Updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            }
-            contact_data.append(contact_info)
+        contact_df = self._contacts_frame(contacts)
         
         # Handle merging
         if file_exists and merge_strategy == 'update' and 'Contacts' in existing_data:
             print("\n🔄 Merging with existing data...")
-            contact_df = self.merge_contact_data(contact_data, existing_data['Contacts'])
-        else:
-            contact_df = pd.DataFrame(contact_data) if contact_data else pd.DataFrame(columns=["Contact ID", "Email", "First Name", "Last Name", "Phone", "Company", "Lifecycle Stage", "Lead Status", "Last Updated"])
-        
-        email_df = pd.DataFrame(email_data) if email_data else pd.DataFrame(columns=["Contact ID", "Contact Email", "Contact Name", "Email Subject", "Email Direction", "Email Status", "Email Date", "Email Preview"])
-        meeting_df = pd.DataFrame(meeting_data) if meeting_data else pd.DataFrame(columns=["Contact ID", "Contact Email", "Contact Name", "Meeting Title", "Meeting Start", "Meeting End", "Meeting Outcome", "Meeting Notes"])
-        
-        # Create summary
-        summary_df = contact_df.copy() if not contact_df.empty else pd.DataFrame()
-        if not summary_df.empty:
-            summary_df["Total Emails"] = 0
-            summary_df["Total Meetings"] = 0
-            summary_df["Last Email Date"] = ""
-            summary_df["Last Meeting Date"] = ""
+            contact_df = self.merge_contact_df(contact_df, existing_data['Contacts'])
         
         # Write to Excel
         print(f"\n💾 Saving to: {full_filepath}")
         
         try:
-            with pd.ExcelWriter(full_filepath, engine='openpyxl', mode='w') as writer:
-                # Export Info
-                metadata = pd.DataFrame([{
-                    "Export Date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "Export Type": export_type,
-                    "Total Contacts": len(contact_df),
-                    "Total Emails": len(email_df),
-                    "Total Meetings": len(meeting_df),
-                    "Status": "Updated" if file_exists else "Created",
-                    "Authentication": "Success"
-                }])
-                metadata.to_excel(writer, sheet_name='Export Info', index=False)
-                
-                # Data sheets
-                summary_df.to_excel(writer, sheet_name='Summary', index=False)
-                contact_df.to_excel(writer, sheet_name='Contacts', index=False)
-                email_df.to_excel(writer, sheet_name='Emails', index=False)
-                meeting_df.to_excel(writer, sheet_name='Meetings', index=False)
+            # Export Info
+            metadata = {
+                "Export Date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "Export Type": export_type,
+                "Total Contacts": len(contact_df),
+                "Total Emails": 0,
+                "Total Meetings": 0,
+                "Status": "Updated" if file_exists else "Created",
+                "Authentication": "Success"
+            }
+            
+            # Give preserved custom columns concrete dtypes too
+            contact_df = contact_df.convert_dtypes()
+            
+            # Summary is Contacts plus constant columns - generate its rows
+            # while writing instead of copying the frame
+            contact_values = self._sheet_values(contact_df)
+            summary_extra = (0, 0, "", "")
+            
+            self._write_fast(full_filepath, {
+                'Export Info': (list(metadata), [tuple(metadata.values())]),
+                'Summary': (list(contact_df.columns) + self.SUMMARY_COLUMNS,
+                            (row + summary_extra for row in contact_values.itertuples(index=False, name=None))),
+                'Contacts': (list(contact_df.columns), contact_values.itertuples(index=False, name=None)),
+                'Emails': (self.EMAIL_COLUMNS, ()),
+                'Meetings': (self.MEETING_COLUMNS, ())
+            })
             
             print(f"\n✅ Export complete!")
             print(f"📊 Summary:")
@@ -345,19 +663,83 @@ class HubSpotExporter:
             print(f"\n❌ Error writing Excel file: {str(e)}")
             return False
     
+    def _write_fast(self, path, sheets):
+        """Stream sheets of (header, rows) into a workbook, preferring xlsxwriter"""
+        if xlsxwriter is not None:
+            self._write_xlsxwriter(path, sheets)
+        else:
+            self._write_openpyxl(path, sheets)
+    
+    def _write_xlsxwriter(self, path, sheets):
+        """Write sheets with xlsxwriter, flushing each row as it goes"""
+        # constant_memory discards rows once written; strings_to_urls=False
+        # skips URL detection on every email/phone string; default_date_format
+        # keeps datetimes readable as dates instead of bare serial numbers
+        wb = xlsxwriter.Workbook(path, {
+            'constant_memory': True,
+            'strings_to_urls': False,
+            'default_date_format': 'yyyy-mm-dd hh:mm:ss'
+        })
+        header_format = wb.add_format({'bold': True})
+        
+        for name, (header, rows) in sheets.items():
+            ws = wb.add_worksheet(name)
+            ws.write_row(0, 0, header, header_format)
+            for r, row in enumerate(rows, start=1):
+                ws.write_row(r, 0, row)
+        
+        wb.close()
+    
+    def _write_openpyxl(self, path, sheets):
+        """Write sheets with an openpyxl write-only workbook"""
+        wb = Workbook(write_only=True)
+        header_font = Font(bold=True)
+        
+        for name, (header, rows) in sheets.items():
+            ws = wb.create_sheet(name)
+            
+            header_cells = []
+            for col in header:
+                cell = WriteOnlyCell(ws, value=col)
+                cell.font = header_font
+                header_cells.append(cell)
+            ws.append(header_cells)
+            
+            for row in rows:
+                ws.append(row)
+        
+        wb.save(path)
+    
+    def _sheet_values(self, df):
+        """Return df as objects with None instead of NaN, so blanks stay blank"""
+        if not df.isna().to_numpy().any():
+            return df
+        return df.astype(object).where(df.notna(), None)
+    
+    def _parse_timestamps(self, values):
+        """Parse a Series of HubSpot ISO-8601 timestamps as UTC, NaT if invalid"""
+        return pd.to_datetime(values, utc=True, errors="coerce", format="ISO8601")
+    
+    def format_timestamps(self, values):
+        """Convert a Series of HubSpot timestamps to readable dates
+
+        Blank values become "" and unparseable ones are kept as they are.
+        Times keep the wall clock they were written in, as before - the
+        offset is dropped rather than converted to UTC.
+        """
+        wall_clock = values.astype("string").str.replace(r"(Z|[+-]\d{2}:?\d{2})$", "", regex=True)
+        parsed = pd.to_datetime(wall_clock, errors="coerce", format="ISO8601")
+        return parsed.dt.strftime("%Y-%m-%d %H:%M:%S").where(parsed.notna(), values.fillna(""))
+    
     def format_timestamp(self, timestamp):
         """Convert HubSpot timestamp to readable date"""
-        if not timestamp:
-            return ""
-        try:
-            dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-            return dt.strftime("%Y-%m-%d %H:%M:%S")
-        except:
-            return timestamp
+        return self.format_timestamps(pd.Series([timestamp], dtype=object)).iloc[0]
 
 
 def main():
     """Main function with menu"""
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    
     print("=" * 70)
     print("HUBSPOT TO EXCEL EXPORTER")
     print("=" * 70)
@@ -373,48 +755,47 @@ def main():
         print("❌ No API key provided. Exiting.")
         return
     
-    exporter = HubSpotExporter(API_KEY)
-    
-    # Test connection first
-    if not exporter.test_connection():
-        return
-    
-    while True:
-        print("\n" + "=" * 70)
-        print("MENU:")
-        print("1. List all available HubSpot lists")
-        print("2. Export contacts from a specific list")
-        print("3. Export ALL contacts")
-        print("4. Exit")
-        print("=" * 70)
+    with HubSpotExporter(API_KEY) as exporter:
+        # Test connection first
+        if not exporter.test_connection():
+            return
         
-        choice = input("\nEnter your choice (1-4): ").strip()
-        
-        if choice == '1':
-            exporter.get_lists()
-            input("\nPress Enter to continue...")
-            
-        elif choice == '2':
-            list_id = input("\nEnter the List ID: ").strip()
-            list_name = input("Enter a friendly name for this list (optional): ").strip()
-            filename = input("Enter filename (default: hubspot_export.xlsx): ").strip() or "hubspot_export.xlsx"
+        while True:
+            print("\n" + "=" * 70)
+            print("MENU:")
+            print("1. List all available HubSpot lists")
+            print("2. Export contacts from a specific list")
+            print("3. Export ALL contacts")
+            print("4. Exit")
+            print("=" * 70)
             
-            exporter.update_excel(
-                filename=filename,
-                list_id=list_id,
-                list_name=list_name
-            )
+            choice = input("\nEnter your choice (1-4): ").strip()
             
-        elif choice == '3':
-            filename = input("\nEnter filename (default: all_contacts.xlsx): ").strip() or "all_contacts.xlsx"
-            exporter.update_excel(filename=filename)
+            if choice == '1':
+                exporter.get_lists()
+                input("\nPress Enter to continue...")
+                
+            elif choice == '2':
+                list_id = input("\nEnter the List ID: ").strip()
+                list_name = input("Enter a friendly name for this list (optional): ").strip()
+                filename = input("Enter filename (default: hubspot_export.xlsx): ").strip() or "hubspot_export.xlsx"
+                
+                exporter.update_excel(
+                    filename=filename,
+                    list_id=list_id,
+                    list_name=list_name
+                )
+                
+            elif choice == '3':
+                filename = input("\nEnter filename (default: all_contacts.xlsx): ").strip() or "all_contacts.xlsx"
+                exporter.update_excel(filename=filename)
+                
+            elif choice == '4':
+                print("\nGoodbye!")
+                break
             
-        elif choice == '4':
-            print("\nGoodbye!")
-            break
-        
-        else:
-            print("\n❌ Invalid choice. Please try again.")
+            else:
+                print("\n❌ Invalid choice. Please try again.")
 
 
 if __name__ == "__main__":
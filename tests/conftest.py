@@ -0,0 +1,19 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                      "HubSpot_to_Excel_SmartUpdate_1.2.py")
+
+
+@pytest.fixture(scope="session")
+def smart_update():
+    pytest.importorskip("pandas")
+    pytest.importorskip("openpyxl")
+    spec = importlib.util.spec_from_file_location("hubspot_smart_update", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,117 @@
+import re
+import zipfile
+from datetime import datetime
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+openpyxl = pytest.importorskip("openpyxl")
+pytest.importorskip("xlsxwriter")
+
+
+def _write_contacts(exporter, path, contact_df):
+    values = exporter._sheet_values(contact_df)
+    exporter._write_fast(path, {
+        'Export Info': (["Export Type"], [("Test",)]),
+        'Summary': (list(contact_df.columns) + exporter.SUMMARY_COLUMNS,
+                    (row + (0, 0, "", "") for row in values.itertuples(index=False, name=None))),
+        'Contacts': (list(contact_df.columns), values.itertuples(index=False, name=None)),
+        'Emails': (exporter.EMAIL_COLUMNS, ()),
+        'Meetings': (exporter.MEETING_COLUMNS, ())
+    })
+
+
+def test_date_custom_column_round_trips(smart_update, tmp_path):
+    exporter = smart_update.HubSpotExporter("test-token")
+    due = datetime(2024, 5, 1)
+    contact_df = pd.DataFrame({
+        "Contact ID": ["1000", "1001"],
+        "Email": ["a@example.com", "b@example.com"],
+        "Due": [due, None]
+    })
+    path = str(tmp_path / "export.xlsx")
+    _write_contacts(exporter, path, contact_df)
+    
+    loaded = exporter.load_existing_data(path)['Contacts']
+    assert loaded["Due"].iloc[0] == due
+    
+    summary = pd.read_excel(path, sheet_name="Summary")
+    assert summary["Due"].iloc[0] == due
+    
+    wb = openpyxl.load_workbook(path)
+    for name in ("Summary", "Contacts"):
+        assert wb[name]["A1"].font.b
+        assert wb[name]["C2"].number_format == "yyyy-mm-dd hh:mm:ss"
+
+
+def test_merge_matches_float_ids_with_blanks(smart_update):
+    exporter = smart_update.HubSpotExporter("test-token")
+    # A blank Contact ID cell makes pandas load the column as float64
+    existing = pd.DataFrame({
+        "Contact ID": [1000.0, None, 1001.0],
+        "Notes": ["keep me", "orphan", "me too"]
+    })
+    new_df = exporter._contacts_frame([
+        {"id": "1000", "properties": {"email": "a@example.com"}},
+        {"id": "1001", "properties": {"email": "b@example.com"}},
+        {"id": "1002", "properties": {"email": "c@example.com"}}
+    ])
+    
+    new_ids = new_df["Contact ID"].copy()
+    
+    merged = exporter.merge_contact_df(new_df, existing)
+    assert list(merged["Notes"]) == ["keep me", "me too", ""]
+    # The caller's frame is left as it was
+    pd.testing.assert_series_equal(new_df["Contact ID"], new_ids)
+
+
+
+def test_blank_header_columns_survive_merge(smart_update, tmp_path):
+    exporter = smart_update.HubSpotExporter("test-token")
+    path = tmp_path / "export.xlsx"
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Contacts"
+    ws.append(["Contact ID", "Email", None, "Notes", None])
+    ws.append([1000, "a@example.com", "typed without a header", "keep me", None])
+    ws.append([1001, "b@example.com", None, None, "another"])
+    wb.save(path)
+    
+    existing = exporter.load_existing_data(str(path))['Contacts']
+    assert list(existing.columns) == ["Contact ID", "Unnamed: 2", "Notes", "Unnamed: 4"]
+    
+    new_df = exporter._contacts_frame([
+        {"id": "1000", "properties": {"email": "a@example.com"}},
+        {"id": "1001", "properties": {"email": "b@example.com"}}
+    ])
+    merged = exporter.merge_contact_df(new_df, existing)
+    assert list(merged["Unnamed: 2"]) == ["typed without a header", ""]
+    assert list(merged["Unnamed: 4"]) == ["", "another"]
+
+
+
+def test_short_rows_load_without_dimension(smart_update, tmp_path):
+    exporter = smart_update.HubSpotExporter("test-token")
+    written = tmp_path / "written.xlsx"
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Contacts"
+    ws.append(["Contact ID", "Email", "First Name", "Notes"])
+    ws.append([1000, "a@example.com"])
+    ws.append([1001, "b@example.com", "B", "keep me"])
+    wb.save(written)
+    
+    # Some writers leave out <dimension>; read-only rows then stop at
+    # their last cell instead of being padded to the header
+    path = tmp_path / "export.xlsx"
+    with zipfile.ZipFile(written) as zin, zipfile.ZipFile(path, "w") as zout:
+        for item in zin.infolist():
+            data = zin.read(item.filename)
+            if item.filename.startswith("xl/worksheets/"):
+                data = re.sub(rb"<dimension[^>]*/>", b"", data)
+            zout.writestr(item, data)
+    
+    existing = exporter.load_existing_data(str(path))['Contacts']
+    assert list(existing["Contact ID"]) == [1000, 1001]
+    assert existing["Notes"].isna().iloc[0]
+    assert existing["Notes"].iloc[1] == "keep me"
@@ -0,0 +1,189 @@
+import json
+import os
+from datetime import datetime, timezone
+
+import pytest
+
+
+class FakeResponse:
+    def __init__(self, data, status_code=200):
+        self.status_code = status_code
+        self.content = json.dumps(data).encode("utf-8")
+        self.text = self.content.decode("utf-8")
+    
+    def json(self):
+        return json.loads(self.content)
+
+
+class FakeHubSpot:
+    """Stands in for the requests.Session behind one HubSpot list
+
+    members maps contact id -> hs_lastmodifieddate in epoch milliseconds.
+    With search_sees_list=False the Search API finds nothing for the list,
+    as when ilslists doesn't know the id.
+    """
+    
+    def __init__(self, members, search_sees_list=True):
+        self.members = dict(members)
+        self.search_sees_list = search_sees_list
+        self.posts = []
+        self.gets = []
+    
+    def post(self, url, json=None, **kwargs):
+        self.posts.append(dict(json))
+        filters = [f for group in json.get("filterGroups", []) for f in group["filters"]]
+        since = [int(f["value"]) for f in filters if f["propertyName"] == "hs_lastmodifieddate"]
+        
+        ids = sorted(self.members, key=int) if self.search_sees_list else []
+        if since:
+            ids = [i for i in ids if self.members[i] >= since[0]]
+        start = int(json.get("after", 0))
+        page = ids[start:start + json["limit"]]
+        
+        data = {"total": len(ids), "results": [self._v3_contact(i) for i in page]}
+        if start + json["limit"] < len(ids):
+            data["paging"] = {"next": {"after": str(start + json["limit"])}}
+        return FakeResponse(data)
+    
+    def get(self, url, params=None, **kwargs):
+        self.gets.append(url)
+        ids = sorted(self.members, key=int)
+        start = params["vidOffset"]
+        page = ids[start:start + params["count"]]
+        return FakeResponse({
+            "contacts": [{"vid": int(i), "properties": {"email": {"value": f"{i}@example.com"}}}
+                         for i in page],
+            "has-more": start + len(page) < len(ids),
+            "vid-offset": start + len(page)
+        })
+    
+    def close(self):
+        pass
+    
+    def _v3_contact(self, contact_id):
+        modified = datetime.fromtimestamp(self.members[contact_id] / 1000, timezone.utc)
+        return {"id": contact_id, "properties": {
+            "email": f"{contact_id}@example.com",
+            "hs_lastmodifieddate": modified.isoformat().replace("+00:00", "Z")
+        }}
+
+
+def _members(count, modified=1700000000000):
+    return {str(1000 + i): modified + i for i in range(count)}
+
+
+@pytest.fixture
+def exporter(smart_update, tmp_path):
+    exporter = smart_update.HubSpotExporter("test-token")
+    exporter.cache_dir = str(tmp_path / "cache")
+    exporter.SEARCH_MIN_INTERVAL = 0
+    return exporter
+
+
+def _ids(contacts):
+    return sorted(contact["id"] for contact in contacts)
+
+
+def test_search_follows_paging_cursor(exporter):
+    exporter.session = hubspot = FakeHubSpot(_members(450))
+    
+    contacts = exporter.get_contacts_from_list("42")
+    
+    assert _ids(contacts) == sorted(hubspot.members)
+    assert [post.get("after") for post in hubspot.posts] == [None, "200", "400"]
+    assert hubspot.gets == []
+
+
+def test_search_over_limit_falls_back_to_list_pagination(exporter):
+    exporter.SEARCH_MAX_RESULTS = 100
+    exporter.session = hubspot = FakeHubSpot(_members(150))
+    
+    contacts = exporter.get_contacts_from_list("42")
+    
+    assert _ids(contacts) == sorted(hubspot.members)
+    assert len(hubspot.posts) == 1
+    assert len(hubspot.gets) == 2
+
+
+def test_empty_search_is_checked_against_list_pagination(exporter):
+    exporter.session = hubspot = FakeHubSpot(_members(3), search_sees_list=False)
+    
+    contacts = exporter.get_contacts_from_list("42")
+    
+    assert _ids(contacts) == sorted(hubspot.members)
+    assert contacts[0]["properties"]["email"] == "1000@example.com"
+
+
+def test_empty_list_costs_one_list_page(exporter):
+    exporter.session = hubspot = FakeHubSpot({})
+    
+    assert exporter.get_contacts_from_list("42") == []
+    assert len(hubspot.gets) == 1
+
+
+def _modified_since(post):
+    return [int(f["value"]) for group in post.get("filterGroups", []) for f in group["filters"]
+            if f["propertyName"] == "hs_lastmodifieddate"]
+
+
+def test_cache_refresh_fetches_only_changed_contacts(exporter):
+    exporter.session = hubspot = FakeHubSpot(_members(3))
+    exporter.get_contacts_from_list("42")
+    watermark = max(hubspot.members.values())
+    
+    hubspot.members["1000"] = watermark + 5000
+    hubspot.posts.clear()
+    contacts = exporter.get_contacts_from_list("42")
+    
+    # One delta search from the watermark, then the size check
+    assert [_modified_since(post) for post in hubspot.posts] == [[watermark], []]
+    assert hubspot.posts[1]["limit"] == 1
+    assert _ids(contacts) == ["1000", "1001", "1002"]
+    changed = next(contact for contact in contacts if contact["id"] == "1000")
+    assert changed["properties"]["hs_lastmodifieddate"].startswith("2023-11-14T22:13:25")
+
+
+def test_cache_repulls_when_list_size_changes(exporter):
+    exporter.session = hubspot = FakeHubSpot(_members(3))
+    exporter.get_contacts_from_list("42")
+    
+    # Leaving a list doesn't touch hs_lastmodifieddate, so no delta shows it
+    del hubspot.members["1001"]
+    hubspot.posts.clear()
+    contacts = exporter.get_contacts_from_list("42")
+    
+    assert _ids(contacts) == ["1000", "1002"]
+    assert _modified_since(hubspot.posts[-1]) == []
+    assert hubspot.posts[-1]["limit"] == 200
+
+
+def test_cache_expires_after_max_age(exporter):
+    exporter.session = hubspot = FakeHubSpot(_members(3))
+    exporter.get_contacts_from_list("42")
+    
+    state_path = os.path.join(exporter.cache_dir, "state.json")
+    with open(state_path, encoding="utf-8") as f:
+        state = json.load(f)
+    for entry in state.values():
+        entry["refreshed"] -= exporter.CACHE_MAX_AGE + 1
+    with open(state_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    
+    hubspot.posts.clear()
+    exporter.get_contacts_from_list("42")
+    
+    assert [_modified_since(post) for post in hubspot.posts] == [[]]
+
+
+def test_cache_is_scoped_to_token(smart_update, exporter):
+    exporter.session = hubspot = FakeHubSpot(_members(3))
+    exporter.get_contacts_from_list("42")
+    
+    other = smart_update.HubSpotExporter("other-token")
+    other.cache_dir = exporter.cache_dir
+    other.SEARCH_MIN_INTERVAL = 0
+    other.session = other_hubspot = FakeHubSpot(_members(2, modified=1710000000000))
+    contacts = other.get_contacts_from_list("42")
+    
+    assert _ids(contacts) == ["1000", "1001"]
+    assert [_modified_since(post) for post in other_hubspot.posts] == [[]]